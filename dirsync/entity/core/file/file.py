@@ -4,7 +4,13 @@ class File(ABC):
     '''Abstract file class.'''
 
     @abstractmethod
-    def calculate_blake2b_hash(self) -> str:
+    def calculate_content_hash(self) -> bytes:
+        '''
+        Calculates a hash of the file contents. Hashes are only compared within a single
+        run to detect modified, moved and copied files, not stored or used for security,
+        so implementations may trade collision resistance for speed and smaller keys:
+        a 128-bit digest keeps accidental collisions negligible for any realistic tree.
+        '''
         pass
 
     @abstractmethod
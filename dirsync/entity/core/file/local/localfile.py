@@ -1,7 +1,26 @@
+from functools import partial
 import hashlib
+import os
 
 from dirsync.entity.core.file.file import File
 
+# size of file hashes in bytes, see File.calculate_content_hash for the tradeoffs
+DIGEST_SIZE = 16
+
+# prefer BLAKE3 when installed (SIMD-accelerated, several times faster than BLAKE2b);
+# selected once at import so all hashes within a run are comparable
+try:
+    from blake3 import blake3 as HASHER
+    # BLAKE3 output length is chosen when finalizing the hash
+    DIGEST_KWARGS = {'length': DIGEST_SIZE}
+except ImportError:
+    HASHER = partial(hashlib.blake2b, digest_size=DIGEST_SIZE)
+    DIGEST_KWARGS = {}
+
+# files up to this size are read in a single call and hashed in one update,
+# avoiding the per-call buffer allocation and read loop of `hashlib.file_digest`
+SMALL_FILE_SIZE = 256 * 1024
+
 class LocalFile(File):
     '''
     Represents a file in a LocalDirectoryRepository.
@@ -12,39 +31,55 @@ class LocalFile(File):
         absolute path of file in filesystem
     rel_path : str
         relative path of file with respect to repository root
-    last_hash : str
+    last_hash : bytes
         hash of file before last edit/deletion
+    stat_key : tuple[int, int]
+        size and modification time (ns) of file when `last_hash` was calculated
 
     Methods
     -------
-    calculate_blake2b_hash() -> str:
-        Calculates the BLAKE2b hash of the file and sets the object's `last_hash` attribute.
+    calculate_content_hash() -> bytes:
+        Calculates the content hash of the file and sets the object's `last_hash` attribute.
     read() -> bytes:
         Reads in the file and returns its contents as a `bytes` object.
     '''
 
     def __init__(self,
                  abs_path: str,
-                 rel_path: str):
+                 rel_path: str,
+                 hash_on_init: bool = True):
         self.abs_path: str = abs_path
         self.rel_path: str = rel_path
-        self.last_hash: str = None
-        self.calculate_blake2b_hash()
+        self.last_hash: bytes = None
+        self.stat_key: tuple[int, int] = None
+        # hashing may be deferred by callers hashing several files at once
+        if hash_on_init:
+            self.calculate_content_hash()
 
-    def calculate_blake2b_hash(self) -> str:
+    def calculate_content_hash(self) -> bytes:
         '''
-        Calculates the BLAKE2b hash of the file and sets the object's `last_hash` attribute.
+        Calculates the content hash of the file and sets the object's `last_hash` attribute,
+        as well as the `stat_key` attribute used to detect whether the file needs rehashing.
+        BLAKE3 is used if the `blake3` package is installed, BLAKE2b otherwise.
 
         Returns:
-            hash (str): the BLAKE2b hash of the file
+            hash (bytes): the content hash of the file
         '''
 
-        hasher = hashlib.blake2b()
         with open(self.abs_path, "rb") as file:
-            for chunk in iter(lambda: file.read(4096), b""):
-                hasher.update(chunk)
+            # stat before reading, so that edits made while hashing change the key
+            stat = os.fstat(file.fileno())
+            self.stat_key = (stat.st_size, stat.st_mtime_ns)
+            if stat.st_size <= SMALL_FILE_SIZE:
+                hasher = HASHER(file.read())
+            else:
+                # hint kernel to read ahead aggressively, as the file is read start to end
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                # file_digest runs the read/update loop in C, releasing the GIL on large buffers
+                hasher = hashlib.file_digest(file, HASHER)
 
-        self.last_hash = hasher.hexdigest()
+        self.last_hash = hasher.digest(**DIGEST_KWARGS)
         return self.last_hash
 
     def read(self) -> bytes:
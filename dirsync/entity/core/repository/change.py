@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from enum import Enum
+
+class ChangeType(Enum):
+    '''Represents the operation recorded in Change objects.'''
+    CREATE = 1
+    MODIFY = 2
+    MOVE = 3
+    COPY = 4
+    DELETE = 5
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    '''
+    Represents a single change detected in a repository.
+
+    Attributes
+    ----------
+    command : ChangeType
+        operation that took place
+    file_hash : bytes
+        hash of the file after the operation (before it, for deletions)
+    file_loc : str
+        location of the affected file in the repository
+    '''
+    command: ChangeType
+    file_hash: bytes
+    file_loc: str
+
+    def __str__(self) -> str:
+        return f'{self.command.name.lower()} {self.file_hash.hex()} -> {self.file_loc}'
\ No newline at end of file
@@ -1,13 +1,28 @@
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+import errno
 import os
 import shutil
+from stat import S_ISREG
 
-from dirsync.entity.core.file.local.localfile import LocalFile
+from dirsync.entity.core.file.file import File
+from dirsync.entity.core.file.local.localfile import LocalFile, SMALL_FILE_SIZE
+from dirsync.entity.core.repository.change import Change, ChangeType
+from dirsync.entity.core.repository.local.localdirwatcher import LocalDirectoryWatcher
 from dirsync.entity.core.repository.repository import Repository
 
 from dirsync.entity.infra.config import Config
 from dirsync.entity.infra.exceptions import LogfileInRepoError, DestinationRepoNotEmptyError
 
+# number of small files hashed by each worker task
+HASH_BATCH_LENGTH = 32
+
+def _hash_batch(files: list[LocalFile]) -> None:
+    '''Recalculates the hashes of a batch of files.'''
+    for file in files:
+        file.calculate_content_hash()
+
 class LocalDirectoryRepositoryState(Enum):
     '''Represents last action taken in LocalDirectoryRepository objects.'''
     INIT = 1
@@ -32,26 +47,52 @@ class LocalDirectoryRepository(Repository):
         last action executed in repository
     filepath_file_map : dict[str, LocalFile]
         maps file paths from directory root to LocalFile objects
-    hash_file_map : dict[str, list[LocalFile]]
+    hash_file_map : dict[bytes, set[LocalFile]]
         maps hashes of files in directory to LocalFile objects
 
     Methods
     -------
-    update_status() -> list[str]:
+    update_status() -> list[Change]:
         Updates the state of the object by scanning the directory for changes.
-    _contains(path: str) -> bool:
+    _prune_dir(dirpath: str) -> bool:
+        Removes untracked files and empty directories from a directory subtree.
+    _ensure_dir(dirpath: str) -> None:
+        Creates a directory inside the repository, unless it is already known to exist.
+    _write_in_dir(abs_path: str, write: Callable[[], object]) -> None:
+        Writes a file inside the repository, recreating its directory if removed externally.
+    _forget_dir(dirpath: str) -> None:
+        Removes a directory and its subdirectories from the known directories.
+    _remove_from_hash_map(file_hash: bytes, file: LocalFile) -> None:
+        Removes a file from hash_file_map, dropping hashes no file has anymore.
+    _add_file(abs_path: str, rel_path: str) -> None:
+        Hashes a file newly written to the repository and adds it to the repository state.
+    _rehash_file(file_obj: LocalFile) -> None:
+        Rehashes a repository file whose contents were replaced, updating hash_file_map.
+    _scan_tree() -> tuple[list[tuple[str, os.stat_result]], list[str]]:
+        Scans the whole directory tree for existing and deleted files.
+    _scan_changed_paths(file_paths: set[str], dir_paths: set[str]) -> tuple[list[tuple[str, os.stat_result]], list[str]]:
+        Scans only the given changed files and directory trees for existing and deleted files.
+    _iter_files(path: str) -> Iterator[os.DirEntry]:
+        Yields a directory entry for every file in a directory tree.
+    _hash_files(files: list[LocalFile], file_sizes: list[int]) -> None:
+        Recalculates the hashes of the given files concurrently.
+    _contains(abs_path: str) -> bool:
         Returns whether the given file is part of the directory tree.
     get_file_at_path(rel_path: str) -> LocalFile:
        Returns a LocalFile object found using its relative path.
-    get_file_with_hash(file_hash: str) -> LocalFile:
+    get_file_with_hash(file_hash: bytes) -> LocalFile:
        Returns a LocalFile object found using its hash.
     create_file(rel_path: str, content: bytes) -> None:
         Creates a new repository file at a relative path storing contents provided as a `bytes` object.
     modify_file(rel_path: str, content: bytes) -> None:
         Replaces the contents of a repository file at a relative path with the provided `bytes` content.
-    move_file(src_hash: str, dest_rel_path: str) -> None:
+    create_file_from(rel_path: str, src_file: File) -> None:
+        Creates a new repository file at a relative path with the contents of a file from any repository.
+    modify_file_from(rel_path: str, src_file: File) -> None:
+        Replaces the contents of a repository file at a relative path with those of a file from any repository.
+    move_file(src_hash: bytes, dest_rel_path: str) -> None:
         Moves a file already existing in the repository to another location.
-    copy_file(src_hash: str, dest_rel_path: str) -> None:
+    copy_file(src_hash: bytes, dest_rel_path: str) -> None:
         Copies a file already existing in the repository to another location.
     delete_file(rel_path: str) -> None:
         Deletes an existing repository file at a relative path.
@@ -64,18 +105,31 @@ class LocalDirectoryRepository(Repository):
                  path: str,
                  config: Config):
         self.path = os.path.abspath(path)
+        # root path including trailing separator and its length, used to test and slice paths
+        self._path_with_sep = os.path.join(self.path, '')
+        self._prefix_len = len(self._path_with_sep)
 
-        if self._contains(config.logfile_path):
+        if self._contains(config.logfile_abspath):
             raise LogfileInRepoError()
-        if self.path == os.path.abspath(config.dest_dir) and os.listdir(self.path):
+        if self.path == config.dest_dir_abspath and os.listdir(self.path):
             raise DestinationRepoNotEmptyError()
 
         self.filepath_file_map: dict[str, LocalFile] = {}
-        self.hash_file_map: dict[str, list[LocalFile]] = {}
+        self.hash_file_map: dict[bytes, set[LocalFile]] = {}
+        # directories known to exist, sparing existence checks when writing files
+        self._known_dirs: set[str] = {self.path}
+
+        # watch directory where supported, so that only changed paths have to be rescanned
+        self._watcher: LocalDirectoryWatcher = None
+        if LocalDirectoryWatcher.is_supported():
+            try:
+                self._watcher = LocalDirectoryWatcher(self.path)
+            except OSError: # inotify instance/watch limits reached, fall back to full scans
+                pass
 
         self.last_action: LocalDirectoryRepositoryState = LocalDirectoryRepositoryState.INIT
 
-    def update_status(self) -> list[str]:
+    def update_status(self) -> list[Change]:
         '''
         Updates the state of the object by scanning the directory for changes. Considers all
         `copy` operations as `create` ones when the object's `state` attribute is INIT,
@@ -83,68 +137,88 @@ class LocalDirectoryRepository(Repository):
         
         Returns
         -------
-        new_changes : list[str]
+        new_changes : list[Change]
             log of all changes since last execution
         '''
 
-        new_changes: list[str] = []
-        # walk directory and all subdirectories to get file paths
-        abs_file_paths = []
-        for dirpath, _, filenames in os.walk(self.path):
-            for filename in filenames:
-                abs_file_paths.append(os.path.join(dirpath, filename))
-
-        # create entries and log changes for new files
-        moved_file_hashes = []
-        for abs_file_path in abs_file_paths:
-            rel_file_path = abs_file_path[len(self.path) + 1:]
+        new_changes: list[Change] = []
+        # only rescan paths reported by the watcher, unless there is no watcher, this is
+        # the first execution or changes may have been missed
+        changed_paths = self._watcher.poll() if self._watcher is not None else None
+        if changed_paths is None or self.last_action == LocalDirectoryRepositoryState.INIT:
+            file_stats, deleted_rel_paths = self._scan_tree()
+        else:
+            file_stats, deleted_rel_paths = self._scan_changed_paths(*changed_paths)
+
+        # collect new files and files changed since last hashed, along with their previous hashes
+        files_to_hash: list[LocalFile] = []
+        file_sizes: list[int] = []
+        previous_hashes: list[bytes] = []
+        for abs_file_path, stat in file_stats:
+            rel_file_path = abs_file_path[self._prefix_len:]
             if rel_file_path not in self.filepath_file_map:
-                new_file = LocalFile(abs_file_path, rel_file_path)
-                self.filepath_file_map[rel_file_path] = new_file
+                files_to_hash.append(LocalFile(abs_file_path, rel_file_path, hash_on_init=False))
+                file_sizes.append(stat.st_size)
+                previous_hashes.append(None)
+            else:
+                file = self.filepath_file_map[rel_file_path]
+                # skip rehashing files whose size and modification time are unchanged
+                if (stat.st_size, stat.st_mtime_ns) != file.stat_key:
+                    files_to_hash.append(file)
+                    file_sizes.append(stat.st_size)
+                    previous_hashes.append(file.last_hash)
+
+        self._hash_files(files_to_hash, file_sizes)
+
+        # sequentially update maps and log changes, new files first checked for moves/copies
+        deleted_rel_paths_set = set(deleted_rel_paths)
+        moved_file_hashes: set[bytes] = set()
+        for file, file_last_hash in zip(files_to_hash, previous_hashes):
+            if file_last_hash is None:
+                new_file = file
+                self.filepath_file_map[new_file.rel_path] = new_file
 
                 # check whether file has been moved/copied using hash
                 if new_file.last_hash in self.hash_file_map:
                     # try to find at least one version of file still in directory tree
                     file_copied = False
                     for original_file in self.hash_file_map[new_file.last_hash]:
-                        if os.path.isfile(original_file.abs_path): # one original file still exists (copied)
+                        # scan already established which tracked files no longer exist
+                        if original_file.rel_path not in deleted_rel_paths_set: # one original file still exists (copied)
                             # consider all files created the first time this method runs
                             if self.last_action == LocalDirectoryRepositoryState.INIT:
-                                new_changes.append(f'create {new_file.last_hash} -> {new_file.rel_path}')
+                                new_changes.append(Change(ChangeType.CREATE, new_file.last_hash, new_file.rel_path))
                             else:
-                                new_changes.append(f'copy {new_file.last_hash} -> {new_file.rel_path}')
-                            self.hash_file_map[new_file.last_hash].append(new_file)
+                                new_changes.append(Change(ChangeType.COPY, new_file.last_hash, new_file.rel_path))
+                            self.hash_file_map[new_file.last_hash].add(new_file)
                             file_copied = True
                             break
                     if not file_copied: # no original file exists anymore (moved)
-                        new_changes.append(f'move {new_file.last_hash} -> {new_file.rel_path}')
-                        moved_file_hashes.append(new_file.last_hash)
-                        self.hash_file_map[new_file.last_hash].append(new_file)
+                        new_changes.append(Change(ChangeType.MOVE, new_file.last_hash, new_file.rel_path))
+                        moved_file_hashes.add(new_file.last_hash)
+                        self.hash_file_map[new_file.last_hash].add(new_file)
                 else: # file not copied/moved (create)
-                    self.hash_file_map[new_file.last_hash] = [new_file]
-                    new_changes.append(f'create {new_file.last_hash} -> {new_file.rel_path}')
+                    self.hash_file_map[new_file.last_hash] = {new_file}
+                    new_changes.append(Change(ChangeType.CREATE, new_file.last_hash, new_file.rel_path))
             else: # check and log if file has been modified using hash
-                file = self.filepath_file_map[rel_file_path]
-                file_last_hash = file.last_hash
-                file_new_hash = file.calculate_blake2b_hash()
+                file_new_hash = file.last_hash
                 if file_last_hash != file_new_hash:
-                    self.hash_file_map[file_last_hash].remove(file)
+                    self._remove_from_hash_map(file_last_hash, file)
                     # check if another file was copied and renamed to original
                     if file_new_hash not in self.hash_file_map:
-                        self.hash_file_map[file_new_hash] = [file]
-                        new_changes.append(f'modify {file_new_hash} -> {file.rel_path}')
+                        self.hash_file_map[file_new_hash] = {file}
+                        new_changes.append(Change(ChangeType.MODIFY, file_new_hash, file.rel_path))
                     else:
-                        self.hash_file_map[file_new_hash].append(file)
-                        new_changes.append(f'copy {file_new_hash} -> {file.rel_path}')
+                        self.hash_file_map[file_new_hash].add(file)
+                        new_changes.append(Change(ChangeType.COPY, file_new_hash, file.rel_path))
 
         # prune deleted files from maps
-        for rel_file_path, file in self.filepath_file_map.copy().items():
-            if not os.path.isfile(file.abs_path):
-                del self.filepath_file_map[rel_file_path]
-                self.hash_file_map[file.last_hash].remove(file)
-                # moving deletes original, operation already logged
-                if file.last_hash not in moved_file_hashes:
-                    new_changes.append(f'delete {file.last_hash} -> {rel_file_path}')
+        for rel_file_path in deleted_rel_paths:
+            file = self.filepath_file_map.pop(rel_file_path)
+            self._remove_from_hash_map(file.last_hash, file)
+            # moving deletes original, operation already logged
+            if file.last_hash not in moved_file_hashes:
+                new_changes.append(Change(ChangeType.DELETE, file.last_hash, rel_file_path))
         
         self.last_action = LocalDirectoryRepositoryState.READ
         return new_changes
@@ -155,30 +229,26 @@ class LocalDirectoryRepository(Repository):
         self.last_action = LocalDirectoryRepositoryState.GET
         return self.filepath_file_map[rel_path]
 
-    def get_file_with_hash(self, file_hash: str) -> LocalFile:
+    def get_file_with_hash(self, file_hash: bytes) -> LocalFile:
         '''Returns a LocalFile object found using its hash.'''
 
         self.last_action = LocalDirectoryRepositoryState.GET
-        return self.hash_file_map[file_hash]
+        return next(iter(self.hash_file_map[file_hash]))
 
     def create_file(self, rel_path: str, content: bytes) -> None:
         '''Creates a new repository file at a relative path storing contents provided as a `bytes` object.'''
 
-        abs_path = self.path + os.sep + rel_path
+        abs_path = os.path.join(self.path, rel_path)
 
-        # create path if needed
-        dirpath = os.sep.join(abs_path.split(os.sep)[:-1])
-        if not os.path.exists(dirpath):
-            os.makedirs(dirpath)
+        def write_file() -> None:
+            with open(abs_path, 'wb') as file:
+                file.write(content)
 
-        # write file
-        with open(abs_path, 'wb') as file:
-            file.write(content)
+        # write file, creating path if needed
+        self._write_in_dir(abs_path, write_file)
 
-        # add file refernce to repository state
-        file_obj = LocalFile(abs_path, rel_path)
-        self.filepath_file_map[rel_path] = file_obj
-        self.hash_file_map[file_obj.last_hash] = [file_obj]
+        # add file reference to repository state
+        self._add_file(abs_path, rel_path)
 
         self.last_action = LocalDirectoryRepositoryState.CREATE
 
@@ -186,33 +256,70 @@ class LocalDirectoryRepository(Repository):
         '''Replaces the contents of a repository file at a relative path with the provided `bytes` content.'''
 
         file_obj = self.filepath_file_map[rel_path]
-        old_hash = file_obj.last_hash
 
-        abs_path = self.path + os.sep + rel_path
-        with open(abs_path, 'wb') as file:
+        with open(file_obj.abs_path, 'wb') as file:
             file.write(content)
 
         # replace in map with new hash
-        self.hash_file_map[old_hash].remove(file_obj)
-        new_hash = file_obj.calculate_blake2b_hash()
-        self.hash_file_map[new_hash] = [file_obj]
+        self._rehash_file(file_obj)
 
         self.last_action = LocalDirectoryRepositoryState.MODIFY
 
-    def move_file(self, src_hash: str, dest_rel_path: str) -> None:
+    def create_file_from(self, rel_path: str, src_file: File) -> None:
+        '''
+        Creates a new repository file at a relative path with the contents of a file from any repository.
+        Local source files are copied without reading them into memory.
+        '''
+        if not isinstance(src_file, LocalFile):
+            self.create_file(rel_path, src_file.read())
+            return
+
+        abs_path = os.path.join(self.path, rel_path)
+
+        # copy file contents, using in-kernel copies where available, creating path if needed
+        self._write_in_dir(abs_path, lambda: shutil.copyfile(src_file.abs_path, abs_path))
+
+        # add file reference to repository state
+        self._add_file(abs_path, rel_path)
+
+        self.last_action = LocalDirectoryRepositoryState.CREATE
+
+    def modify_file_from(self, rel_path: str, src_file: File) -> None:
+        '''
+        Replaces the contents of a repository file at a relative path with those of a file from any repository.
+        Local source files are copied without reading them into memory.
+        '''
+        if not isinstance(src_file, LocalFile):
+            self.modify_file(rel_path, src_file.read())
+            return
+
+        file_obj = self.filepath_file_map[rel_path]
+
+        shutil.copyfile(src_file.abs_path, file_obj.abs_path)
+
+        # replace in map with new hash
+        self._rehash_file(file_obj)
+
+        self.last_action = LocalDirectoryRepositoryState.MODIFY
+
+    def move_file(self, src_hash: bytes, dest_rel_path: str) -> None:
         '''Moves a file already existing in the repository to another location.'''
 
-        file_obj = self.hash_file_map[src_hash][0]
+        file_obj = next(iter(self.hash_file_map[src_hash]))
         src_abs_path = file_obj.abs_path
-        dest_abs_path = self.path + os.sep + dest_rel_path
+        dest_abs_path = os.path.join(self.path, dest_rel_path)
 
-        # create path if needed
-        dirpath = os.sep.join(dest_abs_path.split(os.sep)[:-1])
-        if not os.path.exists(dirpath):
-            os.makedirs(dirpath)
+        def move() -> None:
+            # rename in place unless crossing filesystems
+            try:
+                os.rename(src_abs_path, dest_abs_path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(src_abs_path, dest_abs_path)
 
-        # move file
-        shutil.move(src_abs_path, dest_abs_path)
+        # move file, creating path if needed
+        self._write_in_dir(dest_abs_path, move)
 
         # update file object and filepath map
         file_obj.abs_path = dest_abs_path
@@ -223,25 +330,24 @@ class LocalDirectoryRepository(Repository):
 
         self.last_action = LocalDirectoryRepositoryState.MOVE
 
-    def copy_file(self, src_hash: str, dest_rel_path: str) -> None:
+    def copy_file(self, src_hash: bytes, dest_rel_path: str) -> None:
         '''Copies a file already existing in the repository to another location.'''
 
-        src_file_obj = self.hash_file_map[src_hash][0]
+        src_file_obj = next(iter(self.hash_file_map[src_hash]))
         src_abs_path = src_file_obj.abs_path
-        dest_abs_path = self.path + os.sep + dest_rel_path
+        dest_abs_path = os.path.join(self.path, dest_rel_path)
 
-        # create path if needed
-        dirpath = os.sep.join(dest_abs_path.split(os.sep)[:-1])
-        if not os.path.exists(dirpath):
-            os.makedirs(dirpath)
+        # copy file contents only (metadata is not synced), using in-kernel copies where available,
+        # creating path if needed
+        self._write_in_dir(dest_abs_path, lambda: shutil.copyfile(src_abs_path, dest_abs_path))
 
-        # copy file
-        shutil.copy(src_abs_path, dest_abs_path)
+        # replace any overwritten file, so it is no longer used as a source for its old hash
+        if dest_rel_path in self.filepath_file_map:
+            overwritten_file_obj = self.filepath_file_map[dest_rel_path]
+            self._remove_from_hash_map(overwritten_file_obj.last_hash, overwritten_file_obj)
 
         # create new file object
-        dest_file_obj = LocalFile(dest_abs_path, dest_rel_path)
-        self.filepath_file_map[dest_rel_path] = dest_file_obj
-        self.hash_file_map[dest_file_obj.last_hash].append(dest_file_obj)
+        self._add_file(dest_abs_path, dest_rel_path)
 
         self.last_action = LocalDirectoryRepositoryState.COPY
 
@@ -257,7 +363,7 @@ class LocalDirectoryRepository(Repository):
 
         # remove references to file
         del self.filepath_file_map[rel_path]
-        self.hash_file_map[file_hash].remove(file_obj)
+        self._remove_from_hash_map(file_hash, file_obj)
 
         self.last_action = LocalDirectoryRepositoryState.DELETE
 
@@ -266,23 +372,207 @@ class LocalDirectoryRepository(Repository):
         Recursively removes any empty directories inside the repository,
         as well as files not in its state.
         '''
-        # delete empty directories
-        for dirpath, subdirs, filenames in os.walk(self.path, topdown=False):
-            if not subdirs and not filenames and dirpath != self.path:
-                os.rmdir(dirpath)
-
-        # delete unreferenced files
-        for dirpath, _, filenames in os.walk(self.path):
-            for filename in filenames:
-                abs_path = os.path.join(dirpath, filename)
-                rel_path = abs_path[len(self.path) + 1:]
-                if rel_path not in self.filepath_file_map:
-                    os.remove(abs_path)
+        self._prune_dir(self.path)
 
         self.last_action = LocalDirectoryRepositoryState.PRUNE
 
-    def _contains(self, path_to_test: str) -> bool:
+    def _prune_dir(self, dirpath: str) -> bool:
         '''
-        Returns whether the given file is part of the directory tree.
+        Removes files not in the repository state from a directory subtree, as well as
+        any directories left empty by doing so, in a single bottom-up pass.
+
+        Returns:
+            empty (bool): whether `dirpath` is empty after pruning
+        '''
+        with os.scandir(dirpath) as entries:
+            entries = list(entries)
+
+        remaining = len(entries)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if self._prune_dir(entry.path):
+                    os.rmdir(entry.path)
+                    self._known_dirs.discard(entry.path)
+                    remaining -= 1
+            elif entry.path[self._prefix_len:] not in self.filepath_file_map:
+                os.remove(entry.path)
+                remaining -= 1
+
+        return remaining == 0
+
+    def _ensure_dir(self, dirpath: str) -> None:
+        '''
+        Creates a directory (and any missing parents) inside the repository, unless it
+        is already known to exist.
+        '''
+        if dirpath in self._known_dirs:
+            return
+
+        os.makedirs(dirpath, exist_ok=True)
+        # register directory along with its ancestors up to the repository root
+        while dirpath not in self._known_dirs:
+            self._known_dirs.add(dirpath)
+            dirpath = os.path.dirname(dirpath)
+
+    def _write_in_dir(self, abs_path: str, write: Callable[[], object]) -> None:
+        '''
+        Runs an operation writing a file at an absolute path inside the repository, creating
+        its directory first if needed. Known directories may still have been removed outside
+        of the program, in which case they are forgotten and recreated before retrying once.
+        '''
+        dirpath = os.path.dirname(abs_path)
+        self._ensure_dir(dirpath)
+        try:
+            write()
+        except FileNotFoundError:
+            if os.path.isdir(dirpath): # missing source file, not directory
+                raise
+            # forget topmost removed directory, along with everything below it
+            removed_dirpath = dirpath
+            while not os.path.isdir(os.path.dirname(removed_dirpath)):
+                removed_dirpath = os.path.dirname(removed_dirpath)
+            self._forget_dir(removed_dirpath)
+
+            self._ensure_dir(dirpath)
+            write()
+
+    def _forget_dir(self, dirpath: str) -> None:
+        '''Removes a directory and its subdirectories from the known directories.'''
+        prefix = os.path.join(dirpath, '')
+        self._known_dirs = {known_dirpath for known_dirpath in self._known_dirs
+                            if known_dirpath != dirpath and not known_dirpath.startswith(prefix)}
+
+    def _remove_from_hash_map(self, file_hash: bytes, file: LocalFile) -> None:
+        '''
+        Removes a file from hash_file_map, dropping its hash entirely once no file has it.
+        Otherwise, files later found with that hash would be logged as moved or copied
+        from files that no longer exist.
+        '''
+        files = self.hash_file_map[file_hash]
+        files.remove(file)
+        if not files:
+            del self.hash_file_map[file_hash]
+
+    def _add_file(self, abs_path: str, rel_path: str) -> None:
+        '''Hashes a file newly written to the repository and adds it to the repository state.'''
+        file_obj = LocalFile(abs_path, rel_path)
+        self.filepath_file_map[rel_path] = file_obj
+        self.hash_file_map.setdefault(file_obj.last_hash, set()).add(file_obj)
+
+    def _rehash_file(self, file_obj: LocalFile) -> None:
+        '''Rehashes a repository file whose contents were replaced, updating hash_file_map.'''
+        self._remove_from_hash_map(file_obj.last_hash, file_obj)
+        file_obj.calculate_content_hash()
+        self.hash_file_map.setdefault(file_obj.last_hash, set()).add(file_obj)
+
+    def _scan_tree(self) -> tuple[list[tuple[str, os.stat_result]], list[str]]:
+        '''
+        Scans the whole directory tree.
+
+        Returns:
+            file_stats (list[tuple[str, os.stat_result]]): absolute paths and stats of all files
+            deleted_rel_paths (list[str]): relative paths of tracked files no longer found
+        '''
+        file_stats = [(entry.path, entry.stat()) for entry in self._iter_files(self.path)]
+        seen_rel_paths = {abs_path[self._prefix_len:] for abs_path, _ in file_stats}
+        deleted_rel_paths = [rel_path for rel_path in self.filepath_file_map
+                             if rel_path not in seen_rel_paths]
+
+        return file_stats, deleted_rel_paths
+
+    def _scan_changed_paths(self,
+                            file_paths: set[str],
+                            dir_paths: set[str]) -> tuple[list[tuple[str, os.stat_result]], list[str]]:
+        '''
+        Scans only the given changed files and directory trees.
+
+        Returns:
+            file_stats (list[tuple[str, os.stat_result]]): absolute paths and stats of existing files
+            deleted_rel_paths (list[str]): relative paths of tracked files no longer found
+        '''
+        file_stats = []
+        seen_rel_paths = set()
+        deleted_rel_paths = []
+
+        # rescan changed (created, moved or deleted) directory trees
+        for dirpath in dir_paths:
+            for entry in self._iter_files(dirpath):
+                rel_path = entry.path[self._prefix_len:]
+                if rel_path not in seen_rel_paths: # trees may be nested
+                    seen_rel_paths.add(rel_path)
+                    file_stats.append((entry.path, entry.stat()))
+        tree_prefixes = tuple(os.path.join(dirpath, '')[self._prefix_len:] for dirpath in dir_paths)
+        if tree_prefixes:
+            deleted_rel_paths.extend(rel_path for rel_path in self.filepath_file_map
+                                     if rel_path.startswith(tree_prefixes)
+                                     and rel_path not in seen_rel_paths)
+
+        # check changed files outside of rescanned trees
+        for abs_path in file_paths:
+            rel_path = abs_path[self._prefix_len:]
+            if rel_path.startswith(tree_prefixes):
+                continue
+            try:
+                stat = os.stat(abs_path)
+            except OSError:
+                stat = None
+            if stat is not None and S_ISREG(stat.st_mode):
+                file_stats.append((abs_path, stat))
+            elif rel_path in self.filepath_file_map:
+                deleted_rel_paths.append(rel_path)
+
+        return file_stats, deleted_rel_paths
+
+    def _iter_files(self, path: str) -> Iterator[os.DirEntry]:
+        '''
+        Yields a directory entry for every file in a directory tree. Entries cache
+        the file type and stat information, saving a syscall per file compared to
+        `os.walk` followed by `os.path.isfile`/`os.stat` calls.
+        '''
+        # explicit stack instead of recursion to handle arbitrarily deep trees
+        dirpaths = [path]
+        while dirpaths:
+            # like os.walk, skip directories that cannot be listed (e.g. removed meanwhile)
+            try:
+                entries = os.scandir(dirpaths.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirpaths.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+
+    def _hash_files(self, files: list[LocalFile], file_sizes: list[int]) -> None:
+        '''
+        Recalculates the hashes of the given files concurrently. Hashing releases the GIL,
+        so threads overlap both disk reads and hash computation. Each worker only touches
+        its own LocalFile objects, leaving repository maps to be updated by the caller.
+        '''
+        # large files are hashed individually, small ones in batches so that
+        # per-task dispatching overhead does not dominate their (short) hashing time;
+        # large files are submitted largest first, so the longest tasks start streaming
+        # right away and the small batches fill the remaining workers around them
+        large_files = sorted(((size, file) for file, size in zip(files, file_sizes)
+                              if size > SMALL_FILE_SIZE), key=lambda item: item[0], reverse=True)
+        batches = [[file] for _, file in large_files]
+        small_files = [file for file, size in zip(files, file_sizes) if size <= SMALL_FILE_SIZE]
+        for i in range(0, len(small_files), HASH_BATCH_LENGTH):
+            batches.append(small_files[i:i + HASH_BATCH_LENGTH])
+
+        if len(batches) < 2:
+            for file in files:
+                file.calculate_content_hash()
+            return
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # consume results to propagate any exceptions raised in workers
+            for _ in executor.map(_hash_batch, batches):
+                pass
+
+    def _contains(self, abs_path: str) -> bool:
+        '''
+        Returns whether the given file (referenced by its absolute path) is part of the directory tree.
         '''
-        return os.path.abspath(path_to_test).startswith(self.path + os.sep)
+        return abs_path.startswith(self._path_with_sep)
@@ -0,0 +1,124 @@
+import os
+
+# inotify is only available on Linux, through the optional `inotify_simple` package
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+class LocalDirectoryWatcher:
+    '''
+    Watches a local directory tree for changes using inotify, so that only the
+    affected paths have to be rescanned instead of the whole tree.
+
+    Attributes
+    ----------
+    path : str
+        absolute path of watched directory in filesystem
+
+    Methods
+    -------
+    is_supported() -> bool:
+        Returns whether directory watching is supported on the current platform.
+    poll() -> tuple[set[str], set[str]] | None:
+        Returns the paths changed since the last call, or None if changes may have been missed.
+    _watch_tree(path: str) -> None:
+        Recursively registers watches for a directory and its subdirectories.
+    _unwatch_tree(path: str) -> None:
+        Removes watches for a directory and its subdirectories.
+    '''
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self._inotify = INotify()
+        self._wd_dirpath_map: dict[int, str] = {}
+        # set once a watch could not be registered (e.g. watch limit reached), since
+        # changes in the affected directory would go unnoticed from then on
+        self._degraded: bool = False
+
+        self._watch_tree(self.path)
+
+    @staticmethod
+    def is_supported() -> bool:
+        '''Returns whether directory watching is supported on the current platform.'''
+        return INotify is not None
+
+    def poll(self) -> tuple[set[str], set[str]] | None:
+        '''
+        Returns the paths changed since the last call, without blocking.
+
+        Returns:
+            changed_paths (tuple[set[str], set[str]] | None): absolute paths of files created,
+                modified or deleted, and of directory trees created, moved or deleted, or
+                None if events were lost and the whole tree has to be rescanned
+        '''
+        file_paths: set[str] = set()
+        dir_paths: set[str] = set()
+        events_lost = self._degraded
+
+        for event in self._inotify.read(timeout=0):
+            if event.mask & flags.Q_OVERFLOW:
+                events_lost = True
+                continue
+            if event.mask & flags.IGNORED: # watched directory deleted or unwatched
+                self._wd_dirpath_map.pop(event.wd, None)
+                continue
+
+            dirpath = self._wd_dirpath_map.get(event.wd)
+            if dirpath is None or not event.name:
+                continue
+
+            path = os.path.join(dirpath, event.name)
+            if not event.mask & flags.ISDIR:
+                file_paths.add(path)
+                continue
+
+            if event.mask & flags.MOVED_FROM:
+                self._unwatch_tree(path)
+            if event.mask & (flags.CREATE | flags.MOVED_TO):
+                try:
+                    self._watch_tree(path)
+                except OSError:
+                    self._degraded = events_lost = True
+            if event.mask & (flags.CREATE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO):
+                dir_paths.add(path)
+
+        if events_lost:
+            # directories created while events were dropped have to be watched as well
+            if not self._degraded:
+                try:
+                    self._watch_tree(self.path)
+                except OSError:
+                    self._degraded = True
+            return None
+
+        return file_paths, dir_paths
+
+    def _watch_tree(self, path: str) -> None:
+        '''Recursively registers watches for a directory and its subdirectories.'''
+        mask = (flags.CREATE | flags.DELETE | flags.MODIFY | flags.ATTRIB | flags.CLOSE_WRITE
+                | flags.MOVED_FROM | flags.MOVED_TO | flags.ONLYDIR | flags.DONT_FOLLOW)
+
+        dirpaths = [path]
+        while dirpaths:
+            dirpath = dirpaths.pop()
+            # register watch before listing, so no entry created in between is missed
+            try:
+                wd = self._inotify.add_watch(dirpath, mask)
+                with os.scandir(dirpath) as entries:
+                    dirpaths.extend(entry.path for entry in entries
+                                    if entry.is_dir(follow_symlinks=False))
+            except (FileNotFoundError, NotADirectoryError): # removed in the meantime
+                continue
+            self._wd_dirpath_map[wd] = dirpath
+
+    def _unwatch_tree(self, path: str) -> None:
+        '''Removes watches for a directory and its subdirectories.'''
+        prefix = os.path.join(path, '')
+        for wd, dirpath in list(self._wd_dirpath_map.items()):
+            if dirpath == path or dirpath.startswith(prefix):
+                del self._wd_dirpath_map[wd]
+                try:
+                    self._inotify.rm_watch(wd)
+                except OSError: # watch already removed by the kernel
+                    pass
\ No newline at end of file
@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
 
 from dirsync.entity.core.file.file import File
+from dirsync.entity.core.repository.change import Change, ChangeType
 
 class Repository(ABC):
     '''Abstract repository class.'''
 
     @abstractmethod
-    def update_status(self) -> list[str]:
+    def update_status(self) -> list[Change]:
         pass
 
     @abstractmethod
@@ -14,7 +15,7 @@ class Repository(ABC):
         pass
 
     @abstractmethod
-    def get_file_with_hash(self, file_hash: str) -> File:
+    def get_file_with_hash(self, file_hash: bytes) -> File:
         pass
 
     @abstractmethod
@@ -26,17 +27,47 @@ class Repository(ABC):
         pass
 
     @abstractmethod
-    def move_file(self, src_hash: str, dest_rel_path: str) -> None:
+    def create_file_from(self, rel_path: str, src_file: File) -> None:
         pass
 
     @abstractmethod
-    def copy_file(self, src_hash: str, dest_rel_path: str) -> None:
+    def modify_file_from(self, rel_path: str, src_file: File) -> None:
+        pass
+
+    @abstractmethod
+    def move_file(self, src_hash: bytes, dest_rel_path: str) -> None:
+        pass
+
+    @abstractmethod
+    def copy_file(self, src_hash: bytes, dest_rel_path: str) -> None:
         pass
 
     @abstractmethod
     def delete_file(self, rel_path: str) -> None:
         pass
 
+    def apply_changes(self, changes: list[Change], src_repo: 'Repository') -> None:
+        '''
+        Replays changes logged by another repository, in the order they were logged,
+        as later changes may read files written by earlier ones.
+        '''
+        for change in changes:
+            self._apply_change(change, src_repo)
+
+    def _apply_change(self, change: Change, src_repo: 'Repository') -> None:
+        '''Replays a single change logged by another repository.'''
+        match change.command:
+            case ChangeType.CREATE:
+                self.create_file_from(change.file_loc, src_repo.get_file_at_path(change.file_loc))
+            case ChangeType.MODIFY:
+                self.modify_file_from(change.file_loc, src_repo.get_file_at_path(change.file_loc))
+            case ChangeType.MOVE:
+                self.move_file(change.file_hash, change.file_loc)
+            case ChangeType.COPY:
+                self.copy_file(change.file_hash, change.file_loc)
+            case ChangeType.DELETE:
+                self.delete_file(change.file_loc)
+
     @abstractmethod
     def prune(self) -> None:
         pass
@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import os
 
 from dirsync.entity.infra.exceptions import InvalidConfigIntervalError
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Config:
     '''
     Container/validator for basic application config values.
@@ -17,12 +18,22 @@ class Config:
         path where the src_dir changelog will be written
     interval_ms : int
         frequency of execution of sync task in milliseconds
+    logfile_abspath : str
+        absolute path of logfile_path, derived on creation
+    dest_dir_abspath : str
+        absolute path of dest_dir, derived on creation
     '''
     src_dir: str
     dest_dir: str
     logfile_path: str
     interval_ms: int
+    logfile_abspath: str = field(init=False, repr=False)
+    dest_dir_abspath: str = field(init=False, repr=False)
 
     def __post_init__(self):
         if self.interval_ms < 1:
             raise InvalidConfigIntervalError()
+
+        # frozen instance, attributes have to be set bypassing __setattr__
+        object.__setattr__(self, 'logfile_abspath', os.path.abspath(self.logfile_path))
+        object.__setattr__(self, 'dest_dir_abspath', os.path.abspath(self.dest_dir))